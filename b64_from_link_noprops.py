@@ -2,48 +2,42 @@ import argparse
 import requests
 import os
 import base64
-
-def convert_file_to_base64(file_path):
-    try:
-        with open(file_path, 'rb') as file:
-            file_content = file.read()
-        
-        base64_encoded = base64.b64encode(file_content)
-        base64_string = base64_encoded.decode('utf-8')
-        
-        padding_needed = len(base64_string) % 4
-        if padding_needed:
-            base64_string += '=' * (4 - padding_needed)
-        
-        return base64_string
-
-    except FileNotFoundError:
-        return "File not found. Please check the file path."
-    except Exception as e:
-        return f"An error occurred: {e}"
+import multiprocessing
+import tempfile
+from typing import List
+from remove_props import process_bson
 
 def download_content(url: str) -> str:
     # Extract the file name from the URL
     file_name = url.split("/")[-1]  # This assumes the URL ends with the file name
-    file_path = os.path.join('data', file_name)
+    os.makedirs('data', exist_ok=True)
+    # Unique per download, so parallel workers never share a path for URLs ending in the same name
+    fd, file_path = tempfile.mkstemp(suffix=f"_{file_name}", dir='data')
     
-    content_bytes = requests.get(url=url).content
-    
-    print(file_path)
-    with open(file_path, 'wb') as file:
-        file.write(content_bytes)
+    # Stream the body straight to disk instead of buffering it in memory first
+    try:
+        with os.fdopen(fd, 'wb') as file, requests.get(url=url, stream=True) as response:
+            response.raise_for_status()
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                file.write(chunk)
+    except BaseException:
+        os.remove(file_path)
+        raise
     
     return file_path
 
-def show_base64_cleaned_from_url(url: str, template: str, output_file: str = None) -> str:
+def show_base64_cleaned_from_url(url: str, template: str = None, output_file: str = None) -> str:
+    # template is deprecated and ignored; it only named the intermediate JSON file the pipeline no longer writes
     file_path = download_content(url=url)
     
     try:
-        os.system(f"python bson_to_json.py -f {file_path} -o results/{template}.json")
-        os.system(f"python remove_props.py -f results/{template}.json")
-        os.system(f"python json_to_bson.py -f results/{template}.json {file_path}.bson")
-        
-        base64_string = convert_file_to_base64(f"{file_path}.bson")
+        # Decode, clean and re-encode in process instead of round-tripping through JSON files
+        with open(file_path, 'rb') as bson_file:
+            bson_data = bson_file.read()
+
+        cleaned_bson = process_bson(bson_data)
+
+        base64_string = base64.b64encode(cleaned_bson).decode('utf-8')
         
         if output_file:
             with open(output_file, 'w') as out_file:
@@ -51,29 +45,48 @@ def show_base64_cleaned_from_url(url: str, template: str, output_file: str = Non
             print(f"Base64 content saved to {output_file}")
         
     finally:
-        # Clean up the files
+        # Clean up the downloaded file
         try:
             os.remove(file_path)
         except OSError as e:
             print(f"Error deleting file {file_path}: {e}")
-        
-        bson_path = f"{file_path}.bson"
-        
-        try:
-            os.remove(bson_path)
-        except OSError as e:
-            print(f"Error deleting file {bson_path}: {e}")
        
 
     return base64_string
 
-if __name__ == '__main__':
+def show_base64_cleaned_from_urls(urls: List[str], output_file: str = None) -> List[str]:
+    # Every URL is independent, so each one is downloaded and cleaned in its own worker process
+    processes = min(len(urls), os.cpu_count() or 1)
+    if processes > 1:
+        with multiprocessing.Pool(processes=processes) as pool:
+            base64_strings = pool.map(show_base64_cleaned_from_url, urls)
+    else:
+        # A single worker would only add process start-up and pickling on top of the same serial work
+        base64_strings = [show_base64_cleaned_from_url(url) for url in urls]
+    
+    if output_file:
+        with open(output_file, 'w') as out_file:
+            out_file.write('\n'.join(base64_strings))
+        print(f"Base64 content saved to {output_file}")
+    
+    return base64_strings
+
+def main() -> None:
+    """
+    Main function to parse arguments and clean the content at the given URLs in process.
+    """
     parser = argparse.ArgumentParser(description="Download content and save it to a BSON file.")
-    parser.add_argument('-u', '--url', type=str, required=True, help="The URL of the resource.")
-    parser.add_argument('-t', '--template', type=str, required=True, help="The template of the resource.")
-    parser.add_argument('-o', '--output', type=str, help="The file to save the Base64 encoded content.")
+    parser.add_argument('-u', '--url', type=str, nargs='+', required=True, help="The URL of the resource. Several URLs are processed in parallel.")
+    parser.add_argument('-t', '--template', type=str, help="Deprecated and ignored. It only named an intermediate file that is no longer written.")
+    parser.add_argument('-o', '--output', type=str, help="The file to save the Base64 encoded content, one line per URL.")
     args = parser.parse_args()
     
-    result = show_base64_cleaned_from_url(args.url, args.template, args.output)
+    if len(args.url) == 1:
+        results = [show_base64_cleaned_from_url(args.url[0], output_file=args.output)]
+    else:
+        results = show_base64_cleaned_from_urls(args.url, args.output)
     if not args.output:
-        print(result)
\ No newline at end of file
+        print('\n'.join(results))
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -1,13 +1,32 @@
 import os
+import re
 import bson
 import json
 import argparse
+import shutil
+import tempfile
 import base64
 import logging
 from bson import Binary, ObjectId, DBRef, Timestamp, Decimal128
-from typing import Any, Dict, Union
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from typing import Any, Callable, Dict, Union
 
-# Setting up logging with default level INFO
+try:
+    import orjson
+except ImportError:  # Compact output falls back to the standard json module, see document_encoder
+    orjson = None
+
+_RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+# A BSON double (type 0x01) with every exponent bit set, i.e. NaN or +/-Infinity
+_NON_FINITE_DOUBLE = re.compile(rb'\x01[^\x00]*\x00[\x00-\xff]{6}[\xf0-\xff][\x7f\xff]')
+
+# The JSON output is written one encoded document and separator at a time, batched by this buffer
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# Setting up logging with default level INFO; the log directory must exist before the handler opens it
+os.makedirs('logs', exist_ok=True)
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(levelname)s - %(message)s',
@@ -17,47 +36,71 @@ logging.basicConfig(
     ]
 )
 
+# Built once at import and indexed by exact type, so encoding a BSON value costs a single lookup
+_HANDLERS = {
+    Binary: lambda obj: {"$binary": base64.b64encode(obj).decode('utf-8')},
+    ObjectId: lambda obj: {"$oid": str(obj)},
+    DBRef: lambda obj: {"$ref": obj.collection, "$id": str(obj.id)},
+    Timestamp: lambda obj: {"$timestamp": {"t": obj.time, "i": obj.inc}},
+    Decimal128: lambda obj: {"$numberDecimal": str(obj)},
+    bytes: lambda obj: {"$binary": base64.b64encode(obj).decode('utf-8')},
+}
+
+def _bson_default(obj: Any) -> Union[Dict[str, Any], str]:
+    """
+    Converts a BSON value to a JSON-serializable format, for use as orjson's default hook.
+
+    Raises:
+        TypeError: If the value is not a supported BSON type.
+    """
+    handler = _HANDLERS.get(type(obj))
+    if handler is None:
+        raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+    return handler(obj)
+
 class BSONEncoder(json.JSONEncoder):
     """
     Custom JSON Encoder for BSON types.
     Converts BSON types to JSON-serializable formats.
     """
     def default(self, obj: Any) -> Union[Dict[str, Any], str]:
-        logging.debug(f"Encoding object of type {type(obj).__name__}")
-        if isinstance(obj, Binary):
-            return {"$binary": base64.b64encode(obj).decode('utf-8')}
-        elif isinstance(obj, ObjectId):
-            return {"$oid": str(obj)}
-        elif isinstance(obj, DBRef):
-            return {"$ref": obj.collection, "$id": str(obj.id)}
-        elif isinstance(obj, Timestamp):
-            return {"$timestamp": {"t": obj.time, "i": obj.inc}}
-        elif isinstance(obj, Decimal128):
-            return {"$numberDecimal": str(obj)}
-        elif isinstance(obj, bytes):
-            return {"$binary": base64.b64encode(obj).decode('utf-8')}
+        handler = _HANDLERS.get(type(obj))
+        if handler is not None:
+            return handler(obj)
         return super().default(obj)
 
-def convert_bson_to_json(data: Any) -> Any:
+def document_encoder(pretty: bool = False) -> Callable[[bytes], bytes]:
     """
-    Recursively converts BSON data to JSON-serializable formats, handling special BSON types.
+    Returns a function that encodes one raw BSON document to UTF-8 JSON.
+
+    orjson is used for compact output when it is installed. The standard json module with
+    BSONEncoder is used otherwise, for indented output, and for documents that may hold NaN or
+    Infinity, which orjson would silently write as null. Datetimes go through the same handlers
+    on both paths, so a document either converts the same way or fails the same way.
 
     Args:
-        data (Any): The BSON data to convert.
+        pretty (bool): Whether to indent the JSON output.
 
     Returns:
-        Any: The converted data in JSON-compatible format.
+        Callable[[bytes], bytes]: The document encoder.
     """
-    logging.debug(f"Converting data of type {type(data).__name__}")
-    if isinstance(data, dict):
-        return {k: convert_bson_to_json(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [convert_bson_to_json(i) for i in data]
-    elif isinstance(data, bytes):
-        return {"$binary": base64.b64encode(data).decode('utf-8')}
-    return data
-
-def bson_to_json(bson_file_path: str, output_file_name: str, overwrite: bool, validate: bool) -> None:
+    encoder = BSONEncoder(indent=4) if pretty else BSONEncoder(separators=(',', ':'))
+
+    def encode_with_json(raw_document: bytes) -> bytes:
+        return encoder.encode(bson.decode(raw_document)).encode('utf-8')
+
+    if orjson is None or pretty:
+        return encode_with_json
+
+    def encode(raw_document: bytes) -> bytes:
+        # The byte pattern can also occur inside other values, which only costs the slower encoder
+        if _NON_FINITE_DOUBLE.search(raw_document):
+            return encode_with_json(raw_document)
+        return orjson.dumps(bson.decode(raw_document), default=_bson_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+    return encode
+
+def bson_to_json(bson_file_path: str, output_file_name: str, overwrite: bool, validate: bool, pretty: bool = False) -> None:
     """
     Converts a BSON file to a JSON file.
 
@@ -65,7 +108,9 @@ def bson_to_json(bson_file_path: str, output_file_name: str, overwrite: bool, va
         bson_file_path (str): The path to the input BSON file.
         output_file_name (str): The name of the output JSON file.
         overwrite (bool): Whether to overwrite the output file if it exists.
-        validate (bool): Whether to validate the BSON file before conversion.
+        validate (bool): Whether to report that the BSON file was validated. Every document is
+            checked while it is decoded, so malformed data fails the conversion either way.
+        pretty (bool): Whether to indent the JSON output for manual editing instead of writing it compactly.
 
     Raises:
         IOError: If the BSON file cannot be read or the JSON file cannot be written.
@@ -81,29 +126,39 @@ def bson_to_json(bson_file_path: str, output_file_name: str, overwrite: bool, va
             logging.info("Operation cancelled by user.")
             return
 
+    encode_document = document_encoder(pretty)
+
     try:
-        with open(bson_file_path, 'rb') as bson_file:
-            logging.debug(f"Reading BSON file: {bson_file_path}")
-            bson_data = bson_file.read()
+        # Written beside the output and swapped in on success, so failed conversions leave any existing file intact
+        tmp_file = tempfile.NamedTemporaryFile('wb', buffering=WRITE_BUFFER_SIZE, delete=False,
+                                               dir=os.path.dirname(output_file_name) or '.')
+        try:
+            with open(bson_file_path, 'rb') as bson_file, tmp_file as json_file:
+                logging.debug(f"Streaming BSON file {bson_file_path} to JSON file {output_file_name}")
+                # Documents are decoded and written one at a time; malformed data raises InvalidBSON here
+                json_file.write(b'[')
+                first = True
+                for document in bson.decode_file_iter(bson_file, codec_options=_RAW_CODEC_OPTIONS):
+                    if not first:
+                        json_file.write(b',')
+                    first = False
+                    json_file.write(encode_document(document.raw))
+                json_file.write(b']')
+            if os.path.exists(output_file_name):
+                shutil.copymode(output_file_name, tmp_file.name)
+            else:
+                # Temporary files are private to their owner, a new output gets the usual umask permissions
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(tmp_file.name, 0o666 & ~umask)
+            os.replace(tmp_file.name, output_file_name)
+        except BaseException:
+            os.remove(tmp_file.name)
+            raise
 
         if validate:
-            logging.info("Validating BSON data...")
-            # Validate BSON by trying to decode it (simply reading it with bson.decode_all)
-            try:
-                bson.decode_all(bson_data)
-                logging.info("BSON validation successful.")
-            except bson.errors.BSONError as e:
-                logging.error(f"BSON validation failed: {e}")
-                raise ValueError("BSON validation failed") from e
-
-        decoded_data = bson.decode_all(bson_data)
-        logging.debug("BSON data successfully decoded")
-
-        converted_data = convert_bson_to_json(decoded_data)
-
-        with open(output_file_name, 'w') as json_file:
-            logging.debug(f"Writing JSON to file: {output_file_name}")
-            json.dump(converted_data, json_file, indent=4, cls=BSONEncoder)
+            # The single decoding pass has already validated every document
+            logging.info("BSON validation successful.")
 
         logging.info(f"Successfully converted BSON to JSON. Output saved to '{output_file_name}'.")
 
@@ -141,7 +196,8 @@ def parse_arguments() -> argparse.Namespace:
     parser.add_argument('-f', '--file', type=str, required=True, help="Path to the BSON file.")
     parser.add_argument('-o', '--output', type=str, help="Name of the output JSON file. If not provided, defaults to the input file name with .json extension.")
     parser.add_argument('-y', '--yes', action='store_true', help="Automatically overwrite the output file if it exists without prompting.")
-    parser.add_argument('-v', '--validate', action='store_true', help="Validate the BSON file before conversion.")
+    parser.add_argument('-v', '--validate', action='store_true', help="Report BSON validation. Documents are validated while they are decoded, so malformed data fails the conversion either way.")
+    parser.add_argument('-p', '--pretty', action='store_true', help="Indent the JSON output for manual editing. By default it is written compactly.")
     parser.add_argument('-l', '--log-level', type=str, choices=['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'], default='INFO', help="Set the logging level. Default is 'INFO'.")
     return parser.parse_args()
 
@@ -158,7 +214,7 @@ def main() -> None:
     output_file_name = args.output if args.output else generate_default_output_name(args.file)
 
     # Convert BSON to JSON
-    bson_to_json(args.file, output_file_name, args.yes, args.validate)
+    bson_to_json(args.file, output_file_name, args.yes, args.validate, args.pretty)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,7 +3,11 @@ import json
 import argparse
 import base64
 from bson import Binary, ObjectId, DBRef, Timestamp, Decimal128
-from typing import Union, Any, Dict, List
+from typing import Any, Dict
+
+# A JSON array is written one encoded document at a time, batched by this buffer; single documents
+# are one write either way
+WRITE_BUFFER_SIZE = 1024 * 1024
 
 def json_to_bson(json_file_path: str, output_file_name: str) -> None:
     """
@@ -18,12 +22,10 @@ def json_to_bson(json_file_path: str, output_file_name: str) -> None:
         ValueError: If the JSON data is not in the expected format.
     """
     try:
-        with open(json_file_path, 'r') as json_file:
-            data = json.load(json_file)
-
-        converted_data = convert_json_to_bson(data)
+        with open(json_file_path, 'r', encoding='utf-8') as json_file:
+            converted_data = json.load(json_file, object_hook=bson_object_hook)
 
-        with open(output_file_name, 'wb') as bson_file:
+        with open(output_file_name, 'wb', buffering=WRITE_BUFFER_SIZE) as bson_file:
             if isinstance(converted_data, list):
                 for doc in converted_data:
                     bson_file.write(bson.encode(doc))
@@ -37,36 +39,38 @@ def json_to_bson(json_file_path: str, output_file_name: str) -> None:
     except Exception as e:
         print(f"An unexpected error occurred: {e}")
 
-def convert_json_to_bson(data: Any) -> Any:
+# Extended JSON markers, checked in this order when an object has several of them
+_MARKER_HANDLERS = {
+    '$binary': lambda data: Binary(base64.b64decode(data['$binary'])),
+    '$oid': lambda data: ObjectId(data['$oid']),
+    '$ref': lambda data: DBRef(data['$ref'], ObjectId(data['$id'])),
+    '$timestamp': lambda data: Timestamp(data['$timestamp']['t'], data['$timestamp']['i']),
+    '$numberDecimal': lambda data: Decimal128(data['$numberDecimal']),
+}
+
+def bson_object_hook(data: Dict[str, Any]) -> Any:
     """
-    Recursively converts JSON data to BSON, handling special BSON types.
+    Converts a JSON object to BSON while it is being parsed, handling special BSON types.
+
+    Used as the object_hook of json.load, so every object is converted exactly once and
+    nested objects have already been converted by the time their parent is seen. Markers are
+    only looked up in objects that have a '$'-prefixed key, wherever it appears, so hand-edited
+    objects such as {"$id": ..., "$ref": ...} are still recognized.
 
     Args:
-        data (Any): The JSON data to convert.
+        data (Dict[str, Any]): The decoded JSON object.
 
     Returns:
-        Any: The converted BSON data.
+        Any: The converted BSON value.
     """
-    if isinstance(data, dict):
-        if '$binary' in data:
-            # needed for bson
-            return Binary(base64.b64decode(data['$binary']))
-        elif '$oid' in data:
-            return ObjectId(data['$oid'])
-        elif '$ref' in data and '$id' in data:
-            return DBRef(data['$ref'], ObjectId(data['$id']))
-        elif '$timestamp' in data:
-            ts = data['$timestamp']
-            return Timestamp(ts['t'], ts['i'])
-        elif '$numberDecimal' in data:
-            return Decimal128(data['$numberDecimal'])
-        else:
-            return {k: convert_json_to_bson(v) for k, v in data.items()}
-    elif isinstance(data, list):
-        return [convert_json_to_bson(i) for i in data]
-    elif isinstance(data, str) and data.startswith('$binary:'):
-        return Binary(base64.b64decode(data.split(':')[1]))
-    
+    if any(k[:1] == '$' for k in data):
+        for marker, handler in _MARKER_HANDLERS.items():
+            if marker in data and (marker != '$ref' or '$id' in data):
+                return handler(data)
+
+    for k, v in data.items():
+        if type(v) is str and v.startswith('$binary:'):
+            data[k] = Binary(base64.b64decode(v.split(':')[1]))
     return data
 
 def main() -> None:
@@ -1,45 +1,273 @@
+import os
 import json
 import argparse
+import shutil
+import tempfile
 import base64
-from typing import Any, Dict, List, Union
+import re
+import multiprocessing
+import bson
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from bson import Binary
+from bson.codec_options import CodecOptions
+from bson.raw_bson import RawBSONDocument
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # Files and 'Content' blobs are then parsed and written by json, see _json_loads
+    orjson = None
+
+_RAW_CODEC_OPTIONS = CodecOptions(document_class=RawBSONDocument)
+
+# Starting workers and shipping blobs to them costs about 15 ms plus 4 ms per MB, against about
+# 20 ms per MB to filter inline, so two cores only pay off past roughly 2.5 MB of 'Content'
+_PARALLEL_MIN_BYTES = 4 * 1024 * 1024
+
+# orjson reads integers outside the 64-bit range as floats, and negatives leave it at 19 digits,
+# so JSON with such long digit runs goes to json
+_ORJSON_LOSSY_INTEGER = re.compile(rb'\d{19,}')
+
+# Matches an 'InventoryId' that is set to anything but null
+# Whitespace sits inside the lookahead, so backtracking cannot skip past "null"
+_NON_NULL_INVENTORY_ID = re.compile(rb'"InventoryId"\s*:(?!\s*null\b)')
+
+def _json_loads(raw_json: bytes) -> Tuple[Any, bool]:
+    """
+    Parses UTF-8 encoded JSON, with orjson when it is installed and can read the data losslessly.
+
+    Returns:
+        Tuple[Any, bool]: The parsed data, and whether orjson parsed it and may serialize it again.
+    """
+    if orjson is not None and not _ORJSON_LOSSY_INTEGER.search(raw_json):
+        try:
+            # orjson rejects bytes subclasses such as Binary, a memoryview is accepted without copying
+            return orjson.loads(memoryview(raw_json)), True
+        except orjson.JSONDecodeError:
+            pass  # NaN, Infinity and out of range numbers are only read by the json module
+    return json.loads(raw_json.decode('utf-8')), False
+
+def _json_dumps(data: Any, use_orjson: bool) -> bytes:
+    """
+    Serializes data to compact UTF-8 encoded JSON, with orjson if _json_loads allowed it.
+    """
+    if use_orjson:
+        return orjson.dumps(data)
+    # ensure_ascii output is pure ASCII, and compact separators leave fewer bytes to base64-encode
+    return json.dumps(data, separators=(',', ':')).encode('ascii')
+
+def _unpack_content(content: Any) -> bytes:
+    """
+    Returns the raw JSON bytes of a 'Content' value, which is either raw bytes or a '$binary' object.
+    """
+    if isinstance(content, bytes):
+        return content
+    elif not isinstance(content, dict):
+        raise TypeError(f"'Content' is neither bytes nor a '$binary' object: {type(content).__name__}")
+    return base64.b64decode(content.get('$binary', ''))
+
+def _repack_content(content: Any, raw_content: bytes) -> Any:
+    """
+    Wraps filtered JSON bytes in the same form as the original 'Content' value.
+    """
+    if isinstance(content, Binary):
+        return Binary(raw_content, content.subtype)
+    elif isinstance(content, bytes):
+        return raw_content
+    return {'$binary': base64.b64encode(raw_content).decode('ascii')}
+
+def _filter_content(raw_content: bytes, search_key: str) -> Optional[bytes]:
+    """
+    Removes elements where 'AssetName' contains the search key or 'InventoryId' is not null
+    from the JSON held in a 'Content' value.
+
+    Args:
+        raw_content (bytes): The UTF-8 encoded JSON content.
+        search_key (str): The key to search for in 'AssetName' to remove elements.
+
+    Returns:
+        Optional[bytes]: The filtered, UTF-8 encoded JSON content, or None if no element was removed.
+    """
+    # Cheap prematch on the raw bytes: without the search key, a non-null 'InventoryId' or
+    # escapes of any kind that could hide either, no element can be removed and parsing is skipped
+    if (search_key.encode('utf-8') not in raw_content
+            and b'\\' not in raw_content
+            and not _NON_NULL_INVENTORY_ID.search(raw_content)):
+        return None
+
+    decoded_json, use_orjson = _json_loads(raw_content)
+
+    elements = decoded_json.get('Elements') if isinstance(decoded_json, dict) else None
+    if not isinstance(elements, list):
+        return None
+
+    filtered = [
+        elem for elem in elements
+        if search_key not in elem.get('AssetName', '') and elem.get('InventoryId') is None
+    ]
+    if len(filtered) == len(elements):
+        return None
+
+    decoded_json['Elements'] = filtered
+    return _json_dumps(decoded_json, use_orjson)
+
+def _try_filter_content(raw_content: bytes, search_key: str) -> Tuple[Optional[bytes], Optional[str]]:
+    """
+    Runs _filter_content, returning the error message instead of raising so that one bad or
+    malformed blob does not abort a batch.
+    """
+    try:
+        return _filter_content(raw_content, search_key), None
+    except (ValueError, TypeError, AttributeError) as e:
+        return None, str(e)
+
+def _filter_contents(blobs: List[bytes], search_key: str) -> Dict[bytes, Tuple[Optional[bytes], Optional[str]]]:
+    """
+    Filters a batch of independent 'Content' blobs, spreading them over worker processes when
+    there are several of them, more than one core to run them on and enough data for parsing to
+    dominate the process overhead.
+    Daemonic processes, such as multiprocessing.Pool workers, cannot start workers and filter inline.
+
+    Args:
+        blobs (List[bytes]): The UTF-8 encoded JSON contents to filter.
+        search_key (str): The key to search for in 'AssetName' to remove elements.
+
+    Returns:
+        Dict[bytes, Tuple[Optional[bytes], Optional[str]]]: The result of _try_filter_content for each blob.
+    """
+    unique_blobs = list(dict.fromkeys(blobs))
+    if (len(unique_blobs) > 1 and (os.cpu_count() or 1) > 1
+            and sum(map(len, unique_blobs)) >= _PARALLEL_MIN_BYTES
+            and not multiprocessing.current_process().daemon):
+        with ProcessPoolExecutor() as executor:
+            results = list(executor.map(_try_filter_content, unique_blobs, repeat(search_key)))
+    else:
+        results = [_try_filter_content(blob, search_key) for blob in unique_blobs]
+    return dict(zip(unique_blobs, results))
+
+def _collect_contents(data: Union[Dict[str, Any], List[Any]], found: List[Tuple[Dict[str, Any], bytes]]) -> None:
+    """
+    Collects every dict holding a 'Content' value, together with its raw JSON bytes.
+    """
+    # Walk with an explicit stack, visiting each container once and never hitting the recursion limit
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if 'Content' in node:
+                try:
+                    found.append((node, _unpack_content(node['Content'])))
+                except (ValueError, TypeError) as e:
+                    # Only the failing blob is skipped, the rest of the node is still walked
+                    print(f"Failed to decode JSON from base64 content: {e}")
+            stack.extend(value for value in node.values() if isinstance(value, (dict, list)))
+
+        elif isinstance(node, list):
+            stack.extend(item for item in node if isinstance(item, (dict, list)))
 
 def process_json(data: Union[Dict[str, Any], List[Any]], search_key: str = "pet") -> None:
     """
-    Recursively processes JSON data to remove elements containing a specific search key in 'AssetName'
+    Processes JSON data to remove elements containing a specific search key in 'AssetName'
     or having a non-null 'InventoryId'. The processed data is then re-encoded in base64 format.
 
+    'Content' may also hold the raw bytes of a freshly decoded BSON document, in which case it
+    is filtered and written back as bytes without going through base64.
+
     Args:
         data (Union[Dict[str, Any], List[Any]]): The JSON data to process.
         search_key (str): The key to search for in 'AssetName' to remove elements.
     """
-    if isinstance(data, dict):
-        if 'Content' in data:
-            base64_content = data['Content'].get('$binary', '')
-            try:
-                decoded_json = json.loads(base64.b64decode(base64_content).decode('utf-8'))
-            except (json.JSONDecodeError, TypeError) as e:
-                print(f"Failed to decode JSON from base64 content: {e}")
-                return
-
-            if 'Elements' in decoded_json and isinstance(decoded_json['Elements'], list):
-                # Remove elements where 'AssetName' contains the search_key or 'InventoryId' is not null
-                decoded_json['Elements'] = [
-                    elem for elem in decoded_json['Elements']
-                    if search_key not in elem.get('AssetName', '') and elem.get('InventoryId') is None
-                ]
-
-            encoded_json = base64.b64encode(json.dumps(decoded_json).encode('utf-8')).decode('utf-8')
-            data['Content'] = {'$binary': encoded_json}
-
-        # Recursively process nested dictionaries and lists
-        for key, value in data.items():
-            if isinstance(value, (dict, list)):
-                process_json(value, search_key)
-
-    elif isinstance(data, list):
-        for item in data:
-            if isinstance(item, (dict, list)):
-                process_json(item, search_key)
+    found = []
+    _collect_contents(data, found)
+    results = _filter_contents([raw_content for _, raw_content in found], search_key)
+
+    for node, raw_content in found:
+        filtered, error = results[raw_content]
+        if error is not None:
+            print(f"Failed to decode JSON from base64 content: {error}")
+        elif filtered is not None:
+            node['Content'] = _repack_content(node['Content'], filtered)
+
+def _collect_raw_contents(value: Any, found: List[bytes]) -> None:
+    """
+    Collects the raw 'Content' bytes found under a lazily decoded BSON value.
+    """
+    stack = [value]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, RawBSONDocument):
+            for key, item in node.items():
+                if key == 'Content' and isinstance(item, bytes):
+                    found.append(item)
+                elif isinstance(item, (RawBSONDocument, list)):
+                    stack.append(item)
+
+        elif isinstance(node, list):
+            stack.extend(item for item in node if isinstance(item, (RawBSONDocument, list)))
+
+def _process_raw(value: Any, results: Dict[bytes, Tuple[Optional[bytes], Optional[str]]]) -> Any:
+    """
+    Applies the filtered 'Content' values to a lazily decoded BSON value.
+
+    Returns:
+        Any: A replacement for the value, or None if nothing under it changed. Untouched
+        subdocuments are kept as RawBSONDocument so they are re-encoded from their original bytes.
+    """
+    if isinstance(value, RawBSONDocument):
+        replacements = {}
+        for key, item in value.items():
+            if key == 'Content' and isinstance(item, bytes):
+                filtered, error = results[item]
+                if error is not None:
+                    # Only the failing blob is left as it was, its siblings are still applied
+                    print(f"Failed to decode JSON from content: {error}")
+                elif filtered is not None:
+                    replacements[key] = _repack_content(item, filtered)
+            else:
+                replaced = _process_raw(item, results)
+                if replaced is not None:
+                    replacements[key] = replaced
+
+        if not replacements:
+            return None
+        return {key: replacements.get(key, item) for key, item in value.items()}
+
+    elif isinstance(value, list):
+        replaced_items = [_process_raw(item, results) for item in value]
+        if all(replaced is None for replaced in replaced_items):
+            return None
+        return [item if replaced is None else replaced for item, replaced in zip(value, replaced_items)]
+
+    return None
+
+def process_bson(bson_data: bytes, search_key: str = "pet") -> bytes:
+    """
+    Removes elements containing a specific search key in 'AssetName' or having a non-null 'InventoryId'
+    directly from BSON data, without converting it to JSON first.
+
+    Documents are decoded lazily as RawBSONDocument, so only the fields on the way to a 'Content'
+    value are materialized and documents without changes are copied through as-is.
+
+    Args:
+        bson_data (bytes): The BSON data to process, one or more concatenated documents.
+        search_key (str): The key to search for in 'AssetName' to remove elements.
+
+    Returns:
+        bytes: The processed BSON data.
+    """
+    documents = list(bson.decode_iter(bson_data, codec_options=_RAW_CODEC_OPTIONS))
+
+    found = []
+    for document in documents:
+        _collect_raw_contents(document, found)
+    results = _filter_contents(found, search_key)
+
+    processed = []
+    for document in documents:
+        replacement = _process_raw(document, results)
+        processed.append(document.raw if replacement is None else bson.encode(replacement))
+    return b''.join(processed)
 
 def remove_props(json_file_path: str, search_key: str = "pet") -> None:
     """
@@ -50,13 +278,21 @@ def remove_props(json_file_path: str, search_key: str = "pet") -> None:
         search_key (str): The key to search for in 'AssetName' to remove elements.
     """
     try:
-        with open(json_file_path, 'r') as json_file:
-            data = json.load(json_file)
+        with open(json_file_path, 'rb') as json_file:
+            data, use_orjson = _json_loads(json_file.read())
 
         process_json(data, search_key)
 
-        with open(json_file_path, 'w') as json_file:
-            json.dump(data, json_file, indent=4)
+        # Write next to the original and swap it in, so a failed write never truncates the only copy
+        tmp_file = tempfile.NamedTemporaryFile('wb', delete=False, dir=os.path.dirname(json_file_path) or '.')
+        try:
+            with tmp_file:
+                tmp_file.write(_json_dumps(data, use_orjson))
+            shutil.copymode(json_file_path, tmp_file.name)
+            os.replace(tmp_file.name, json_file_path)
+        except BaseException:
+            os.remove(tmp_file.name)
+            raise
 
         print(f"Successfully processed JSON. Modified file saved to '{json_file_path}'.")
 
@@ -0,0 +1,33 @@
+import json
+import unittest
+
+from bson import Binary, DBRef, ObjectId
+
+from json_to_bson import bson_object_hook
+
+
+OID = "6acfc5aa8810e978d3602ed0"
+
+
+class BsonObjectHookTests(unittest.TestCase):
+    """
+    Extended JSON markers are recognized wherever they appear in an object.
+    """
+    def load(self, text: str):
+        return json.loads(text, object_hook=bson_object_hook)
+
+    def test_markers_in_written_order(self) -> None:
+        self.assertEqual(self.load('{"$oid": "%s"}' % OID), ObjectId(OID))
+        self.assertEqual(self.load('{"$binary": "eHk="}'), Binary(b'xy'))
+
+    def test_markers_after_other_keys(self) -> None:
+        self.assertEqual(self.load('{"$type": "00", "$binary": "eHk="}'), Binary(b'xy'))
+        self.assertEqual(self.load('{"$id": "%s", "$ref": "rooms"}' % OID), DBRef("rooms", ObjectId(OID)))
+
+    def test_plain_and_incomplete_objects_stay_dicts(self) -> None:
+        self.assertEqual(self.load('{"a": {"b": 1}}'), {"a": {"b": 1}})
+        self.assertEqual(self.load('{"$id": 1}'), {"$id": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,157 @@
+import base64
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest import mock
+
+import bson
+from bson import Binary
+
+import remove_props
+
+
+def content(*elements: dict) -> bytes:
+    """
+    Builds the UTF-8 JSON of a 'Content' blob holding the given elements.
+    """
+    return json.dumps({"Elements": list(elements), "Music": "song"}).encode('utf-8')
+
+
+PET = {"AssetName": "pet_dog", "InventoryId": None}
+OWNED = {"AssetName": "lamp", "InventoryId": 5}
+CHAIR = {"AssetName": "chair", "InventoryId": None}
+
+
+class ProcessBsonTests(unittest.TestCase):
+    """
+    Round trips through process_bson, run with and without orjson.
+    """
+    use_orjson = True
+
+    def setUp(self) -> None:
+        if not self.use_orjson:
+            patcher = mock.patch.object(remove_props, 'orjson', None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        elif remove_props.orjson is None:
+            self.skipTest("orjson is not installed")
+
+    def process(self, *documents: dict) -> list:
+        with redirect_stdout(io.StringIO()):
+            processed = remove_props.process_bson(b''.join(bson.encode(doc) for doc in documents))
+        return bson.decode_all(processed)
+
+    def elements(self, blob: bytes) -> list:
+        return json.loads(bytes(blob))["Elements"]
+
+    def test_bytes_content_is_filtered(self) -> None:
+        [document] = self.process({"Content": content(PET, OWNED, CHAIR)})
+        self.assertIsInstance(document["Content"], bytes)
+        self.assertEqual(self.elements(document["Content"]), [CHAIR])
+
+    def test_binary_content_keeps_its_subtype(self) -> None:
+        [document] = self.process({"nested": {"Content": Binary(content(PET, CHAIR), 5)}})
+        filtered = document["nested"]["Content"]
+        self.assertIsInstance(filtered, Binary)
+        self.assertEqual(filtered.subtype, 5)
+        self.assertEqual(self.elements(filtered), [CHAIR])
+
+    def test_untouched_documents_pass_through_byte_identical(self) -> None:
+        documents = [
+            {"_id": bson.ObjectId(), "Content": content(CHAIR), "Score": 1.5},
+            {"_id": 2, "Other": "y"},
+        ]
+        data = b''.join(bson.encode(doc) for doc in documents)
+        self.assertEqual(remove_props.process_bson(data), data)
+
+    def test_content_in_nested_lists_is_filtered(self) -> None:
+        [document] = self.process({"Rooms": [{"x": 1}, [{"Content": content(PET, CHAIR)}]]})
+        self.assertEqual(document["Rooms"][0], {"x": 1})
+        self.assertEqual(self.elements(document["Rooms"][1][0]["Content"]), [CHAIR])
+
+    def test_bad_blob_does_not_block_its_siblings(self) -> None:
+        [document] = self.process({
+            "Content": b'{"Elements": [pet',
+            "Child": {"Content": content(PET, CHAIR)},
+        })
+        self.assertEqual(document["Content"], b'{"Elements": [pet')
+        self.assertEqual(self.elements(document["Child"]["Content"]), [CHAIR])
+
+    def test_non_dict_element_is_reported_not_raised(self) -> None:
+        [document] = self.process({
+            "Content": json.dumps({"Elements": ["pet"]}).encode('utf-8'),
+            "Child": {"Content": content(PET, CHAIR)},
+        })
+        self.assertEqual(self.elements(document["Content"]), ["pet"])
+        self.assertEqual(self.elements(document["Child"]["Content"]), [CHAIR])
+
+
+class ProcessBsonWithoutOrjsonTests(ProcessBsonTests):
+    use_orjson = False
+
+
+class ProcessJsonTests(unittest.TestCase):
+    """
+    process_json on decoded JSON, where 'Content' is a '$binary' object.
+    """
+    def test_content_that_is_not_binary_is_reported_not_raised(self) -> None:
+        data = {
+            "Content": "oops",
+            "Child": {"Content": {"$binary": base64.b64encode(content(PET, CHAIR)).decode('ascii')}},
+        }
+        output = io.StringIO()
+        with redirect_stdout(output):
+            remove_props.process_json(data)
+        self.assertEqual(data["Content"], "oops")
+        self.assertIn("neither bytes nor a '$binary' object", output.getvalue())
+        filtered = base64.b64decode(data["Child"]["Content"]["$binary"])
+        self.assertEqual(json.loads(filtered)["Elements"], [CHAIR])
+
+
+class FilterContentPrematchTests(unittest.TestCase):
+    """
+    The byte-level prematch must only skip blobs that cannot lose an element.
+    """
+    def test_null_inventory_id_does_not_match(self) -> None:
+        for raw in (b'"InventoryId":null', b'"InventoryId": null', b'"InventoryId" : null', b'"InventoryId":\n  null'):
+            with self.subTest(raw=raw):
+                self.assertIsNone(remove_props._NON_NULL_INVENTORY_ID.search(raw))
+
+    def test_non_null_inventory_id_matches(self) -> None:
+        for raw in (b'"InventoryId":5', b'"InventoryId": 5', b'"InventoryId" : "x"', b'"InventoryId": nullable'):
+            with self.subTest(raw=raw):
+                self.assertIsNotNone(remove_props._NON_NULL_INVENTORY_ID.search(raw))
+
+    def test_spaced_json_without_matches_is_skipped(self) -> None:
+        raw = json.dumps({"Elements": [CHAIR]}).encode('utf-8')
+        with mock.patch.object(remove_props, '_json_loads') as json_loads:
+            self.assertIsNone(remove_props._filter_content(raw, "pet"))
+        json_loads.assert_not_called()
+
+    def test_escaped_search_key_is_parsed(self) -> None:
+        raw = b'{"Elements":[{"AssetName":"pets\\/dog","InventoryId":null},{"AssetName":"x","InventoryId":null}]}'
+        filtered = remove_props._filter_content(raw, "pets/")
+        self.assertEqual(json.loads(filtered)["Elements"], [{"AssetName": "x", "InventoryId": None}])
+
+
+class JsonLoadsTests(unittest.TestCase):
+    """
+    orjson is only used where it reads and writes the data back unchanged.
+    """
+    def test_plain_json_uses_orjson(self) -> None:
+        if remove_props.orjson is None:
+            self.skipTest("orjson is not installed")
+        self.assertEqual(remove_props._json_loads(Binary(b'{"a":1}', 5)), ({"a": 1}, True))
+
+    def test_values_orjson_cannot_keep_fall_back_to_json(self) -> None:
+        for raw in (b'{"a":NaN}', b'{"a":-Infinity}', b'{"a":123456789012345678901234567890}',
+                    b'{"a":-9223372036854775809}'):
+            with self.subTest(raw=raw):
+                data, use_orjson = remove_props._json_loads(raw)
+                self.assertFalse(use_orjson)
+                self.assertEqual(remove_props._json_dumps(data, use_orjson), raw)
+
+
+if __name__ == '__main__':
+    unittest.main()